@@ -30,6 +30,9 @@ On mousedown:
 
 On drag:
     rot = a.drag(x, y)
+
+The matrix returned by drag() is reused by the next drag(), so take a copy if an
+older rotation must be kept.
 """
 
 # Implementation based on:
@@ -54,41 +57,137 @@ def quat4f(x=0.0, y=0.0, z=0.0, w=0.0):
     return np.array((x, y, z, w), 'f')
 
 def matrix4f(m=None):
-    if m == None:
+    if m is None:
         return np.identity(4, 'f')
     else:
         return np.array(m, 'f').reshape((4,4))
 
 def mag(v):
-    return np.linalg.norm(v)
+    # math.hypot avoids np.linalg.norm's dispatch overhead for these short vectors
+    return math.hypot(*v)
 
 def normalise(v):
     return v / mag(v)
 
-def matrix4fSetRotationFromQuat4f(q):
-    """Converts the H quaternion q into a new equivalent 4x4 rotation matrix."""
+def _quatToRot3(x, y, z, w, out):
+    """Write the rotation for quaternion (x, y, z, w) into the top-left 3x3 of array out."""
 
     # This math all comes about by way of algebra, complex math, and trig identities
     # See Lengyel pages 88-92
+    # (scipy.spatial.transform.Rotation would do the same, but it is a large extra
+    # dependency, is slower for a single quaternion, and rejects the all-zero
+    # quaternion used by initialViewUnrotated)
+
+    # A zero quaternion gives s = 0 and so the identity
+    n = x*x + y*y + z*z + w*w
+    s = 2.0 / n if n > 0.0 else 0.0
+
+    xs = x * s;  ys = y * s;  zs = z * s
+    wx = w * xs; wy = w * ys; wz = w * zs
+    xx = x * xs; xy = x * ys; xz = x * zs
+    yy = y * ys; yz = y * zs; zz = z * zs
+
+    out[0,0] = 1.0 - (yy + zz); out[0,1] = xy + wz;         out[0,2] = xz - wy
+    out[1,0] = xy - wz;         out[1,1] = 1.0 - (xx + zz); out[1,2] = yz + wx
+    out[2,0] = xz + wy;         out[2,1] = yz - wx;         out[2,2] = 1.0 - (xx + yy)
+
+    return out
+
+def _quatToMat4(x, y, z, w, out):
+    """Write the rotation matrix for quaternion (x, y, z, w) into the 4x4 array out."""
+    _quatToRot3(x, y, z, w, out)
+    out[0,3] = 0.0; out[1,3] = 0.0; out[2,3] = 0.0
+    out[3,0] = 0.0; out[3,1] = 0.0; out[3,2] = 0.0; out[3,3] = 1.0
+    return out
+
+def matrix4fSetRotationFromQuat4f(q, out=None):
+    """Converts the H quaternion q into an equivalent 4x4 rotation matrix.
+
+    The matrix is written into out if given, otherwise into a new array.
+    """
+    if out is None:
+        out = np.empty((4,4), 'f')
+    x, y, z, w = map(float, q)
+    return _quatToMat4(x, y, z, w, out)
+
+def quatsToMatrices4f(qs, out=None):
+    """Converts an (N,4) array of H quaternions into an (N,4,4) array of rotation matrices.
 
-    X = 0; Y = 1; Z = 2; W = 3
+    Same math as matrix4fSetRotationFromQuat4f, done for all N quaternions at once with
+    numpy array operations. The matrices are written into out if given, otherwise into a
+    new float32 array.
+    """
+    qs = np.asarray(qs, 'f')
+    if out is None:
+        out = np.empty((qs.shape[0], 4, 4), 'f')
+
+    x = qs[:,0]; y = qs[:,1]; z = qs[:,2]; w = qs[:,3]
 
-    n = np.dot(q, q)
-    s = 0.0
-    if (n > 0.0):
-        s = 2.0 / n
+    # A zero quaternion gives s = 0 and so the identity
+    n = (qs * qs).sum(1)
+    s = np.divide(2.0, n, out=np.zeros_like(n), where=n > 0.0)
 
-    xs = q[X] * s;  ys = q[Y] * s;  zs = q[Z] * s
-    wx = q[W] * xs; wy = q[W] * ys; wz = q[W] * zs
-    xx = q[X] * xs; xy = q[X] * ys; xz = q[X] * zs
-    yy = q[Y] * ys; yz = q[Y] * zs; zz = q[Z] * zs
+    xs = x * s;  ys = y * s;  zs = z * s
+    wx = w * xs; wy = w * ys; wz = w * zs
+    xx = x * xs; xy = x * ys; xz = x * zs
+    yy = y * ys; yz = y * zs; zz = z * zs
 
-    m = matrix4f([[1.0 - (yy + zz), xy + wz,         xz - wy,         0.0],
-                  [xy - wz,         1.0 - (xx + zz), yz + wx,         0.0],
-                  [xz + wy,         yz - wx,         1.0 - (xx + yy), 0.0],
-                  [0.0,             0.0,             0.0,             1.0]])
+    out[:,0,0] = 1.0 - (yy + zz); out[:,0,1] = xy + wz;         out[:,0,2] = xz - wy
+    out[:,1,0] = xy - wz;         out[:,1,1] = 1.0 - (xx + zz); out[:,1,2] = yz + wx
+    out[:,2,0] = xz + wy;         out[:,2,1] = yz - wx;         out[:,2,2] = 1.0 - (xx + yy)
+    out[:,:3,3] = 0.0
+    out[:,3,:3] = 0.0
+    out[:,3,3] = 1.0
 
-    return m
+    return out
+
+
+# ---------------------------------------------------------------------------------------
+# Projection surfaces
+
+# Two versions of ArcBallT._mapToSphere, one per projection surface. The one to use is
+# bound to the class below, so there is no USE_GAVIN_BELL_EXTENSION test per mouse event.
+# Both return the (x,y,z) unit vector for position of touch point on sphere. (The default
+# arguments bind globals as fast locals)
+
+def _mapToSphereGavinBell(self, x, y, _sqrt=math.sqrt, _array=np.array):
+    # Calculate mouse coords from centre
+    sx = x - self._cx
+    sy = self._cy - y
+
+    # Compute the squared length of the vector to the point from the centre
+    length2 = sx*sx + sy*sy
+
+    if length2 < self._limit2:
+        # It's on the sphere. Calculate Z
+        z = _sqrt(self._radius2 - length2)
+    else:
+        # The point is outside of the sphere. Use the hyperbola radius2 / (2*length).
+        # Only this branch needs the length itself, and radius2/2 is already in _limit2
+        z = self._limit2 / _sqrt(length2)
+
+    # Normalise
+    inv = 1.0 / _sqrt(length2 + z*z)
+    return _array((sx*inv, sy*inv, z*inv), 'f')
+
+def _mapToSphereStandard(self, x, y, _sqrt=math.sqrt, _array=np.array):
+    # Calculate mouse coords from centre
+    sx = x - self._cx
+    sy = self._cy - y
+
+    # Compute the squared length of the vector to the point from the centre
+    length2 = sx*sx + sy*sy
+
+    if length2 < self._limit2:
+        # It's on the sphere. Calculate Z
+        z = _sqrt(self._radius2 - length2)
+    else:
+        # The point is outside of the sphere. Clamp to Z=0 great circle
+        z = 0.0
+
+    # Normalise
+    inv = 1.0 / _sqrt(length2 + z*z)
+    return _array((sx*inv, sy*inv, z*inv), 'f')
 
 
 # ---------------------------------------------------------------------------------------
@@ -100,8 +199,14 @@ class ArcBallT:
     def __init__(self):
         self.m_StVec = vector3f()
         self.m_EnVec = vector3f()
-        self.m_WindowWidth = 1.0
-        self.m_WindowHeight = 1.0
+        # Rotation at mouse down, copied into the same float32 buffer on every click
+        self._startRot = np.identity(4, 'f')
+        # Incremental rotation and result of drag, written in place on every mouse move
+        # (_dragRot starts as the identity and only its 3x3 rotation part is rewritten, so
+        # its last row and column stay as 0,0,0,1)
+        self._dragRot = np.identity(4, 'f')
+        self._rot = np.identity(4, 'f')
+        self.setBounds(1.0, 1.0)
 
     def __str__(self):
         strRep = ''
@@ -115,83 +220,67 @@ class ArcBallT:
         self.m_WindowWidth = newWidth
         self.m_WindowHeight = newHeight
 
-    def _mapToSphere(self, x, y):
-        # Return (x,y,z) vector for position of touch point on sphere
-        
-        # Calculate mouse coords from centre
-        cx = (self.m_WindowWidth - 1.0) * 0.5
-        cy = (self.m_WindowHeight - 1.0) * 0.5
-        sx = x - cx
-        sy = cy - y
-        minDim = min(self.m_WindowWidth, self.m_WindowHeight) / 2.0
-
-        # Compute the length of the vector to the point from the centre
-        length2 = sx*sx + sy*sy
-        length = math.sqrt(length2)
+        # Everything _mapToSphere needs from the window size is worked out here, once
+        self._cx = (newWidth - 1.0) * 0.5
+        self._cy = (newHeight - 1.0) * 0.5
+        self._minDim = min(newWidth, newHeight) / 2.0
 
         if USE_GAVIN_BELL_EXTENSION:
-
             # Radius of our arc ball - 0.5 of smallest screen dimension from centre
-            radius = 0.5 * minDim
-            radius2 = radius * radius
-
-            if length < radius / math.sqrt(2.0):
-                # It's on the sphere. Calculate Z
-                spherePos = vector3f(sx, sy, math.sqrt(radius2 - length2))
-            else: 
-                # The point is outside of the sphere. Use the hyperbola
-                pz = radius2 / (2.0 * length)
-                spherePos = vector3f(sx, sy, pz)
-
-        else: # Standard ArcBall
-
+            self._radius = 0.5 * self._minDim
+            self._radius2 = self._radius * self._radius
+            # On the sphere while length < radius/sqrt(2), compared squared
+            self._limit2 = self._radius2 * 0.5
+        else:
             # Radius of our arc ball - 0.7 of smallest screen dimension from centre
-            radius = 0.7 * minDim
-            radius2 = radius * radius
-
-            if length < radius:
-                # It's on the sphere. Calculate Z
-                spherePos = vector3f(sx, sy, math.sqrt(radius2 - length2))
-            else: 
-                # The point is outside of the sphere. Clamp to Z=0 great circle
-                spherePos = vector3f(sx, sy, 0.0)
-
-        # Normalise
-        spherePos = normalise(spherePos)
-        return spherePos
+            self._radius = 0.7 * self._minDim
+            self._radius2 = self._radius * self._radius
+            self._limit2 = self._radius2
 
     def click (self, startRot, x, y):
         """Respond to mouse down."""
-        self.startRot = np.copy(startRot)
+        np.copyto(self._startRot, startRot)
         self.m_StVec = self._mapToSphere(x, y)
         return
 
-    def drag (self, x, y):
-        """Respond to mouse drag, calculate rotation."""
-        X = 0; Y = 1; Z = 2; W = 3
+    def drag (self, x, y, _quatToRot3=_quatToRot3, _matmul=np.matmul):
+        """Respond to mouse drag, calculate rotation.
+
+        The keyword arguments only bind globals as fast locals and should not be passed.
 
+        The returned matrix is a buffer owned by this ArcBallT and is overwritten by the
+        next drag, so copy it if an earlier rotation needs to be kept.
+        """
         self.m_EnVec = self._mapToSphere(x, y)
 
+        # Work on plain floats - numpy call overhead swamps the arithmetic for 3-vectors
+        sx, sy, sz = self.m_StVec.tolist()
+        ex, ey, ez = self.m_EnVec.tolist()
+
         # Compute the vector perpendicular to the begin and end vectors
-        perp = np.cross(self.m_StVec, self.m_EnVec)
-
-        # Compute the length of the perpendicular vector
-        if mag(perp) > EPSILON:
-            # We're ok, so return the perpendicular vector as the transform
-            quat = quat4f()
-            quat[X] = perp[X]
-            quat[Y] = perp[Y]
-            quat[Z] = perp[Z]
-            # In the quaternion values, W is cos(theta/2), where theta is rotation angle
-            quat[W] = np.dot(self.m_StVec, self.m_EnVec)
+        px = sy*ez - sz*ey
+        py = sz*ex - sx*ez
+        pz = sx*ey - sy*ex
+
+        # Compare the squared length of the perpendicular vector to avoid a sqrt
+        if px*px + py*py + pz*pz > EPSILON*EPSILON:
+            # The rotation is the one given by the quaternion (perp, dot), i.e. about perp
+            # by twice the angle between the vectors
+            w = sx*ex + sy*ey + sz*ez
         else:
-            # The begin and end vectors coincide, so return a quaternion of zeroes (no rotation)
-            quat = quat4f()
-            
-        r = matrix4fSetRotationFromQuat4f(quat)
+            # The begin and end vectors coincide (or are opposite, a full turn), so use a
+            # quaternion of zeroes (no rotation)
+            px = py = pz = w = 0.0
+
+        # Build the matrix straight from the floats, into a reused buffer
+        r = _quatToRot3(px, py, pz, w, self._dragRot)
+
         # Linear Algebra matrix multiplication A = old, B = New : C = A * B
-        # np.dot does matrix multiplication when given an array rather than a vector
-        return np.dot(self.startRot, r)
+        # np.matmul into the preallocated result avoids an allocation per mouse move
+        return _matmul(self._startRot, r, out=self._rot)
+
+# Choose the projection surface once, at import
+ArcBallT._mapToSphere = _mapToSphereGavinBell if USE_GAVIN_BELL_EXTENSION else _mapToSphereStandard
     
 # Quaternion initial rotation choices
 initialViewUnrotated = quat4f(0.0, 0.0, 0.0, 0.0)
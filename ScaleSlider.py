@@ -9,7 +9,8 @@
 All methods are the same as for QSlider but take floats as well as integers.
 There is an additional method pair setInterval() / interval() which defines the
 float slider step size (which is always 1 in QSlider). setTickInterval() sets
-both the slider tick interval and the scale text interval.
+both the slider tick interval and the scale text interval. Changes made inside
+a blockUpdates() block are applied together when it exits.
 
 Typical usage:
 
@@ -20,12 +21,17 @@ Typical usage:
     slider.setTickInterval(5)
     slider.setTracking(False)
     slider.valueChanged.connect(self.sliderChanged)
+
+    with slider.blockUpdates():
+        slider.setRange(0.0, 50.0)
+        slider.setTickInterval(10)
 """
 
 # Implementation based on:
 # https://stackoverflow.com/questions/42820380/use-float-for-qslider
 # https://www.pythonguis.com/tutorials/pyside-creating-your-own-custom-widgets/
 
+import contextlib
 from PySide6 import QtCore, QtGui, QtWidgets
 
 class Scale(QtWidgets.QWidget):
@@ -34,6 +40,9 @@ class Scale(QtWidgets.QWidget):
     def __init__(self, parent=None, knobWidth=0):
         super(Scale, self).__init__(parent)
         self.knobWidth = knobWidth
+        self._font = QtGui.QFont('Arial', 10)
+        self._fm = QtGui.QFontMetrics(self._font)
+        self._ticks = None
         self.setFixedHeight(10)
         self.setScale(0, 99, -1)
 
@@ -41,24 +50,41 @@ class Scale(QtWidgets.QWidget):
         self.minv = minv
         self.maxv = maxv
         self.tickInterval = tickInterval
-        self.repaint()
-
-    def paintEvent(self, e):
-        w = self.size().width()
-        qp = QtGui.QPainter()
-        qp.begin(self)
-        qp.setFont(QtGui.QFont('Arial', 10))
+        # Labels are rebuilt at the next paint, so a setter never fails part way through
+        # a sequence of range changes
+        self._ticks = None
+        # update() rather than repaint() so several changes give a single paint
+        self.update()
+
+    def resizeEvent(self, e):
+        self._ticks = None
+        super(Scale, self).resizeEvent(e)
+
+    def _rebuildTicks(self, w):
+        # Work out the (x, text) of each scale label, so paintEvent only has to draw them
         if self.tickInterval < 0:
             divs = 1
         else:
             divs = round((self.maxv - self.minv) / self.tickInterval)
+        x0 = self.knobWidth/2
+        xstep = (w-self.knobWidth) / divs
+        vstep = (self.maxv-self.minv) / divs
+        self._ticks = []
         for i in range(divs + 1):
-            x = self.knobWidth/2 + i * (w-self.knobWidth)/divs
-            val = self.minv + i * (self.maxv-self.minv)/divs
+            x = x0 + i * xstep
+            val = self.minv + i * vstep
             text = f'{val:g}'
-            boundingRect = qp.boundingRect(0, 0, 100, 100, QtCore.Qt.AlignCenter, text)
-            textWidth = boundingRect.width()
-            qp.drawText(x - textWidth/2, 10, text)
+            textWidth = self._fm.horizontalAdvance(text)
+            self._ticks.append((x - textWidth/2, text))
+
+    def paintEvent(self, e):
+        qp = QtGui.QPainter()
+        qp.begin(self)
+        qp.setFont(self._font)
+        if self._ticks is None:
+            self._rebuildTicks(self.size().width())
+        for x, text in self._ticks:
+            qp.drawText(x, 10, text)
         qp.end()
 
 class ScaleSlider(QtWidgets.QWidget):
@@ -81,6 +107,8 @@ class ScaleSlider(QtWidgets.QWidget):
         self.maxv = 99
         self.interval = 1
         self.tickInterval = -1
+        self._updating = False
+        self._applied = None
         self._range_adjusted()
 
     def __getattr__(self, name):
@@ -88,12 +116,30 @@ class ScaleSlider(QtWidgets.QWidget):
             return self[name]
 
         try:
-            return getattr(self.slider, name)
+            attr = getattr(self.slider, name)
         except AttributeError:
             raise AttributeError(
             "'{}' object has no attribute '{}'".format(self.__class__.__name__, name)
             )
 
+        # Methods and signals of the slider never change, so store them on self and
+        # later lookups find them without coming back here. Plain values are not
+        # cached as they may change on the slider
+        if callable(attr) or isinstance(attr, QtCore.SignalInstance):
+            self.__dict__[name] = attr
+        return attr
+
+    @contextlib.contextmanager
+    def blockUpdates(self):
+        """Context manager to make several range changes and apply them once at the end."""
+        previous = self._updating
+        self._updating = True
+        try:
+            yield self
+        finally:
+            self._updating = previous
+            self._range_adjusted()
+
     def value(self):
         return self.index * self.interval + self.minv
 
@@ -145,6 +191,13 @@ class ScaleSlider(QtWidgets.QWidget):
         self._range_adjusted()
 
     def _range_adjusted(self):
+        # Nothing to do inside blockUpdates() or if nothing has changed since last time
+        if self._updating:
+            return
+        state = (self.minv, self.maxv, self.interval, self.tickInterval)
+        if state == self._applied:
+            return
+
         r = self.maxv - self.minv
         number_of_steps = int(r / self.interval)
         self.slider.setMaximum(number_of_steps)
@@ -153,3 +206,5 @@ class ScaleSlider(QtWidgets.QWidget):
         else:
             self.slider.setTickInterval(int(self.tickInterval / r * number_of_steps))
         self.scale.setScale(self.minv, self.maxv, self.tickInterval)
+        # Only recorded once everything above has succeeded, so a failed update is retried
+        self._applied = state